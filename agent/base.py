@@ -1,21 +1,130 @@
 from abc import ABC, abstractmethod
+from pathlib import Path
 from typing import Any, Optional
-from pydantic import BaseModel, Field
-from langfuse import observe
+from dataclasses import dataclass, field
+from dotenv import dotenv_values
 from loguru import logger
-import json
+import asyncio
+import functools
+import hashlib
+import os
+import re
+import textwrap
 
+# tracing is decided once at import: without keys `observe` returns the function unchanged,
+# so the hot path pays nothing. The key may live in .env, which is only read here (not exported,
+# `GroqClient` loads it into the environment when the first client is created, before any traced call)
+if os.environ.get("LANGFUSE_PUBLIC_KEY") or dotenv_values().get("LANGFUSE_PUBLIC_KEY"):
+    from langfuse import observe
+else:
+    def observe(**kwargs):
+        """ no-op stand-in for `langfuse.observe` when tracing is disabled """
+        return lambda func: func
+
+from json_utils import json_loads
 from llm.base import LLMClient
 from tools.registry import ToolRegistry
 
+# cheap check for the stop marker, so the (possibly large) response is only JSON-parsed when it may be finished
+FINISHED_RE = re.compile(r'"finished"\s*:\s*true', re.IGNORECASE)
+# final report complete ("finished": true followed by the whole "message"), anything after it can be cancelled
+FINISHED_REPORT_RE = re.compile(
+    r'"finished"\s*:\s*true\s*,\s*"message"\s*:\s*"(?P<message>(?:[^"\\]|\\.)*)"',
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+@functools.lru_cache(maxsize=None)
+def load_prompt(path: str) -> Optional[str]:
+    """ Read a prompt template once per process (None if the file doesn't exist) """
+    prompt_path = Path(path)
+    return prompt_path.read_text(encoding="utf-8") if prompt_path.exists() else None
+
+
+@functools.lru_cache(maxsize=32)
+def build_system_prompt(path: str, fallback: str, tools: str) -> str:
+    """ Prompt template (or `fallback`) with `{tools}` filled, cached per (template, tools) """
+    return normalize_prompt((load_prompt(path) or fallback).replace("{tools}", tools))
+
+
+@functools.lru_cache(maxsize=32)
+def normalize_prompt(prompt: str) -> str:
+    """
+    Byte-stable version of a prompt (dedented, no trailing spaces, one trailing newline),
+    the same prompt must always give the same bytes for provider-side prefix caching to hit.
+    """
+    lines = textwrap.dedent(prompt).strip().splitlines()
+    return "\n".join(line.rstrip() for line in lines) + "\n"
+
+
+def estimate_tokens(message: dict) -> int:
+    """ Rough token count of a message (~4 chars per token), good enough for budgeting """
+    size = len(message.get("content") or "")
+    if message.get("tool_calls"):
+        size += len(str(message["tool_calls"]))
+    return size // 4 + 1
 
-class BaseAgentState(BaseModel):
+
+class MessageLog(list):
+    """
+    Chat history (a plain list of message dicts) that can build a token bounded payload.
+    system/user messages are pinned, the oldest assistant turns (assistant + its tool results)
+    are dropped first, and the latest turn is always kept.
+    """
+    ANCHOR_ROLES = ("system", "user")
+
+    def as_payload(self, max_tokens: Optional[int] = None) -> list[dict]:
+        """
+        Messages to send to the LLM, `max_tokens` bounds the assistant/tool part of the history.
+        """
+        if max_tokens is None:
+            return self
+
+        used = 0
+        cut = len(self)
+        # walk backwards turn by turn, a turn starts at an assistant message
+        for i in range(len(self) - 1, -1, -1):
+            msg = self[i]
+            if msg["role"] in self.ANCHOR_ROLES:
+                continue
+            used += estimate_tokens(msg)
+            if msg["role"] != "assistant":
+                continue
+            if used > max_tokens and cut != len(self):
+                break
+            cut = i
+        else:
+            return self
+
+        return [msg for msg in self[:cut] if msg["role"] in self.ANCHOR_ROLES] + self[cut:]
+
+
+@dataclass(slots=True)
+class BaseAgentState:
     """
     Holds the evolving state of an agent's execution.
+    (plain dataclass: it's mutated every step, pydantic validation buys nothing here)
     """
-    messages: list[dict] = Field(default_factory=list)
+    messages: MessageLog = field(default_factory=MessageLog)
     is_finished: bool = False
     iteration: int = 0
+    # leading messages (system + user) that survive pruning, set by the agent's start_point
+    anchor_count: int = 0
+    # next assistant response already generated while tools were running (speculative planning)
+    speculative_response: Optional[dict] = None
+    speculation_hits: int = 0
+    speculation_misses: int = 0
+    # results of pure (read-only) tools during this run, keyed by (tool name, raw arguments)
+    tool_cache: dict[tuple[str, str], str] = field(default_factory=dict)
+
+    @property
+    def speculation_hit_rate(self) -> float:
+        total = self.speculation_hits + self.speculation_misses
+        return self.speculation_hits / total if total else 0.0
+
+    def __post_init__(self):
+        if not isinstance(self.messages, MessageLog):
+            self.messages = MessageLog(self.messages)
 
     def add_message(self, role: str, content: str, **extra):
         msg = {"role": role, "content": content}
@@ -25,12 +134,22 @@ class BaseAgentState(BaseModel):
         
 
 class Agent(ABC):
-    def __init__( self, llm: LLMClient, tool_registry: ToolRegistry, max_iterations: int = 100):
+    def __init__( self, llm: LLMClient, tool_registry: ToolRegistry, max_iterations: int = 100, max_parallel_tools: int = 4, context_max_tokens: Optional[int] = None, stream_until_finish: bool = False):
         self.llm = llm
         self.tool_registry = tool_registry
+        self._tool_dispatch = tool_registry.dispatch
         self.max_iterations = max_iterations
+        # token budget of the assistant/tool history sent to the LLM (None = send everything)
+        self.context_max_tokens = context_max_tokens
+        # stream responses and cancel generation once the final report is complete
+        self.stream_until_finish = stream_until_finish
+        # upper bound of tool calls running at the same time (per batch)
+        self.max_parallel_tools = max_parallel_tools
         # initial state to start with
         self.inital_state = BaseAgentState()
+        # frozen system message shared by every query (see `set_system_prompt`)
+        self._system_message: Optional[dict] = None
+        self._system_prompt_hash: Optional[str] = None
 
     @abstractmethod
     def start_point(self, *args, **kwargs) -> BaseAgentState:
@@ -42,8 +161,32 @@ class Agent(ABC):
         """ Run 1 Step/Iteration """
         raise NotImplementedError()
 
+    async def arun(self, state: BaseAgentState) -> BaseAgentState:
+        """ Async version of `run`, default runs `run` in a worker thread """
+        return await asyncio.to_thread(self.run, state)
+
+    def set_system_prompt(self, prompt: str) -> dict:
+        """
+        Normalize & freeze the system message, returns it to be used as the first message of every query.
+        """
+        content = normalize_prompt(prompt)
+        self._system_message = {"role": "system", "content": content}
+        self._system_prompt_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        return self._system_message
+
+    def _check_system_prompt(self, state: BaseAgentState):
+        """ The system prefix must stay byte-identical across queries, or the provider prompt cache misses """
+        if self._system_prompt_hash is None or not state.messages:
+            return
+        content = state.messages[0].get("content") or ""
+        if hashlib.sha256(content.encode("utf-8")).hexdigest() != self._system_prompt_hash:
+            logger.warning("System prompt changed since `set_system_prompt`, provider prefix cache will miss")
+
     def iterate(self, *args, **kwargs) -> BaseAgentState:
         state = self.start_point(*args, **kwargs)
+        # files may have changed since the last run (start_point can reuse a state)
+        state.tool_cache.clear()
+        self._check_system_prompt(state)
         while not state.is_finished and state.iteration < self.max_iterations:
             logger.debug(f"Agent Iteration: {state.iteration}")
             state = self.run(state)
@@ -51,29 +194,78 @@ class Agent(ABC):
 
         return state
 
+    async def aiterate(self, *args, **kwargs) -> BaseAgentState:
+        """
+        Async version of `iterate`, many queries can share one event loop:
+            `await asyncio.gather(*(agent.aiterate(q) for q in queries))`
+        """
+        state = self.start_point(*args, **kwargs)
+        # files may have changed since the last run (start_point can reuse a state)
+        state.tool_cache.clear()
+        self._check_system_prompt(state)
+        while not state.is_finished and state.iteration < self.max_iterations:
+            logger.debug(f"Agent Iteration: {state.iteration}")
+            state = await self.arun(state)
+            state.iteration += 1
+
+        return state
+
     # LLM WRAPPER
     @observe(name="llm-call", as_type="generation")
     def llm_generate(self, state: BaseAgentState):
         client_tools = self.tool_registry.to_client_tools(self.llm.config.provider)
-        response_dict = self.llm.generate(state.messages, tools=client_tools)
+        messages = state.messages.as_payload(self.context_max_tokens)
+        if self.stream_until_finish:
+            return self._stream_until_finish(messages, client_tools)
+        response_dict = self.llm.generate(messages, tools=client_tools)
+        return response_dict
+
+    def _stream_until_finish(self, messages: list[dict], client_tools: list[dict]) -> dict:
+        """
+        Stream the response and stop as soon as `FINISHED_REPORT_RE` matches,
+        the returned dict then holds `"stopped_early": True` and a truncated content.
+        """
+        return self.llm.stream_generate(messages, tools=client_tools, stop_pattern=FINISHED_REPORT_RE)
+
+    @observe(name="llm-call", as_type="generation")
+    async def allm_generate(self, state: BaseAgentState):
+        client_tools = self.tool_registry.to_client_tools(self.llm.config.provider)
+        messages = state.messages.as_payload(self.context_max_tokens)
+        if self.stream_until_finish:
+            return await self.llm.astream_generate(messages, tools=client_tools, stop_pattern=FINISHED_REPORT_RE)
+        response_dict = await self.llm.agenerate(messages, tools=client_tools)
         return response_dict
     
     # TOOL EXECUTION WRAPPER
     @observe(name="tool-call", as_type="tool")
-    def call_tool(self, tool_call):
+    def call_tool(self, tool_call, cache: Optional[dict] = None):
+        """ Run one tool call, pure tools are served from/stored in `cache` (a run's `tool_cache`) when given """
         try:
             func_name = tool_call['function']['name']
-            args = json.loads(tool_call['function']['arguments'])
+            args_raw = tool_call['function']['arguments']
             
-            tool_instance = self.tool_registry.get(func_name)
+            tool_instance = self._tool_dispatch.get(func_name)
             if not tool_instance:
                 raise ValueError(f"Tool {func_name} not found")
-                
-            result = tool_instance(**args)
+
+            key = (func_name, args_raw)
+            if cache is not None and tool_instance.pure and key in cache:
+                content = cache[key]
+            elif tool_instance.pure:
+                content = str(tool_instance(**json_loads(args_raw))) # ensure content is string
+                if cache is not None:
+                    cache[key] = content
+            else:
+                # side effects (write_file, ...) may change what pure tools return
+                if cache is not None:
+                    cache.clear()
+                content = str(tool_instance(**json_loads(args_raw)))
+                if cache is not None:
+                    cache.clear()
             return {
                 "role": "tool",
                 "tool_call_id": tool_call['id'],
-                "content": str(result) # ensure content is string
+                "content": content
             }
         except Exception as e:
             logger.error(f"Tool execution error: {e}")
@@ -82,4 +274,56 @@ class Agent(ABC):
                 "tool_call_id": tool_call['id'],
                 "content": f"Error executing tool: {str(e)}"
             }
-    
\ No newline at end of file
+
+    async def call_tool_async(self, tool_call, semaphore: Optional[asyncio.Semaphore] = None, cache: Optional[dict] = None) -> dict:
+        """
+        Run `call_tool` in a worker thread so independent tool calls don't block each other.
+        """
+        if semaphore is None:
+            return await asyncio.to_thread(self.call_tool, tool_call, cache)
+        async with semaphore:
+            return await asyncio.to_thread(self.call_tool, tool_call, cache)
+
+    def _can_overlap(self, tool_calls: list[dict]) -> bool:
+        """ Only read-only (`pure`) tools may run concurrently, side effects keep the order the LLM asked for """
+        for tool_call in tool_calls:
+            tool_instance = self._tool_dispatch.get(tool_call['function']['name'])
+            if tool_instance is not None and not tool_instance.pure:
+                return False
+        return True
+
+    @staticmethod
+    def _batch_cache(cache: Optional[dict], overlap: bool) -> Optional[dict]:
+        """ Cache a batch may use, pure results of a batch with side effects are neither served nor stored """
+        if cache is not None and not overlap:
+            cache.clear()
+            return None
+        return cache
+
+    async def call_tools_async(self, tool_calls: list[dict], cache: Optional[dict] = None) -> list[dict]:
+        """
+        Execute a batch of tool calls, concurrently (bounded by `max_parallel_tools`) when all of them are pure,
+        one after the other in order otherwise. Results keep the same order as `tool_calls`.
+        """
+        overlap = self._can_overlap(tool_calls)
+        cache = self._batch_cache(cache, overlap)
+        if not overlap:
+            return [await self.call_tool_async(tc, cache=cache) for tc in tool_calls]
+        semaphore = asyncio.Semaphore(max(1, self.max_parallel_tools))
+        return await asyncio.gather(*[self.call_tool_async(tc, semaphore, cache) for tc in tool_calls])
+
+    def call_tools(self, tool_calls: list[dict], cache: Optional[dict] = None) -> list[dict]:
+        """
+        Sync entry point for `call_tools_async` used inside `run`.
+        """
+        overlap = self._can_overlap(tool_calls)
+        cache = self._batch_cache(cache, overlap)
+        if len(tool_calls) <= 1 or not overlap:
+            # nothing to overlap (or side effects), skip the event loop
+            return [self.call_tool(tc, cache) for tc in tool_calls]
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.call_tools_async(tool_calls, cache))
+        # called from inside an event loop (asyncio.run can't nest), run them in order
+        return [self.call_tool(tc, cache) for tc in tool_calls]
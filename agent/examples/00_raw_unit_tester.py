@@ -4,15 +4,25 @@ And will execute them and report result
 
 Difference Between it And `01_raw_traced_unit_tester.py` no mlflow/langfuse 
 """
+from agent.base import FINISHED_RE
+from json_utils import json_loads
 from tools.registry import ToolRegistry
 import tools.toolkit.web_explorer as web_explorer_tools
 from tools.toolkit.builtin import code_tools, file_tools, json_tools
 from llm.groq_client import GroqClient, LLMConfig
 from loguru import logger
 import json
+import sys
+import textwrap
+from concurrent.futures import ThreadPoolExecutor
 
 from pathlib import Path
 
+# JSONL logs (C json encoder), written to stderr by a background thread (enqueue)
+# so large tool payloads don't block the agent loop on I/O
+logger.remove()
+logger.add(sys.stderr, level="INFO", enqueue=True, serialize=True)
+
 # ================ 1. Initalization ================
 # 1.1 setup llm client
 config = LLMConfig(
@@ -28,7 +38,7 @@ client = GroqClient(config)
 files_under_test = ["tools/toolkit/web_explorer.py"]
 tests_output_directory_path = "tools/llm_tests"
 
-messages = [
+messages_template = [
     {
         "role": "system", "content": """
         You are a highly skilled QA Automation Agent with expertise in Python programming, unit testing (using Pytest), and modern GenAI tools. 
@@ -50,84 +60,109 @@ messages = [
         """ 
     }
 ]
+# one registry shared by all files (tools are only read while running)
 registry = ToolRegistry()
 registry.register_from_module(web_explorer_tools)
 registry.register_from_module(code_tools)
 registry.register_from_module(file_tools)
 registry.register_from_module(json_tools)
+# playwright's sync API only works on the thread that started it, so every browser tool call
+# goes through this single thread while the files run in parallel
+browser_executor = ThreadPoolExecutor(max_workers=1)
 
-messages[0]["content"] = messages[0]["content"].replace("{tools}", registry.to_string())
-
-messages[1]["content"] = messages[1]["content"].format(
-    files_under_test=str(files_under_test),
-    tests_output_directory_path=str(tests_output_directory_path)
-)
+# dedent/strip once so the system prefix is byte-stable between runs (provider prefix caching)
+messages_template[0]["content"] = textwrap.dedent(messages_template[0]["content"]).strip().replace("{tools}", registry.to_string()) + "\n"
 
-# ================ 2. Starts Iterations ================
+client_tools = registry.to_client_tools(config.provider)
 max_iterations = 20
-iteration = 0
-while True:
-    iteration += 1
-    logger.info(f"Iteration {iteration}")
-    
-    client_tools = registry.to_client_tools(config.provider)
-    response = client.generate(messages, tools=client_tools)
-    
-    messages.append(response)
-    logger.info(f"Assistant Response: {response.get('content')}")
 
-    content = response.get("content") or ""
-    
-    if iteration > max_iterations:
-        logger.warning("Max iterations reached.")
-        break
+# ================ 2. Starts Iterations (per file) ================
+def run_for_file(file_under_test: str) -> list[dict]:
+    """ Run the agent loop for a single file, returns its messages """
+    messages = [
+        messages_template[0],
+        {
+            "role": "user", "content": messages_template[1]["content"].format(
+                files_under_test=str([file_under_test]),
+                tests_output_directory_path=str(tests_output_directory_path)
+            )
+        }
+    ]
+
+    iteration = 0
+    while True:
+        iteration += 1
+        logger.info(f"[{file_under_test}] Iteration {iteration}")
+        
+        response = client.generate(messages, tools=client_tools)
+        
+        messages.append(response)
+        logger.info(f"[{file_under_test}] Assistant Response: {response.get('content')}")
+
+        content = response.get("content") or ""
+        
+        if iteration > max_iterations:
+            logger.warning(f"[{file_under_test}] Max iterations reached.")
+            break
+
+        if content and FINISHED_RE.search(content):
+            # Simple heuristic or try/except JSON parse to find "finished": true
+            try:
+                # Attempt to parse json if the model output pure json or markdown json
+                clean_content = content.strip()
+                if clean_content.startswith("```"):
+                     clean_content = clean_content.split("\n", 1)[-1].rsplit("\n", 1)[0]
+                
+                data = json_loads(clean_content)
+                if data.get("finished") is True:
+                    logger.success(f"[{file_under_test}] Task Finished: {data.get('message')}")
+                    break
+            except json.JSONDecodeError:
+                pass # Continue if not valid json or not finished
+        
+        tool_calls = response.get("tool_calls", []) or []
+        for tool_call in tool_calls:
+            if tool_call["type"] != "function":
+                continue
+            try:
+                func_name = tool_call["function"]["name"]
+                args_raw = tool_call["function"]["arguments"]
+                
+                if isinstance(args_raw, str):
+                    func_inputs = json_loads(args_raw)
+                else:
+                    func_inputs = args_raw
+                
+                tool_instance = registry.get(func_name)
+                if tool_instance:
+                    logger.debug(f"Executing tool {func_name}")
+                    if tool_instance.func.__module__ == web_explorer_tools.__name__:
+                        func_results = browser_executor.submit(tool_instance, **func_inputs).result()
+                    else:
+                        func_results = tool_instance(**func_inputs)
+                else:
+                    func_results = f"Error: Tool {func_name} not found."
+
+                tool_message = {
+                    "role": "tool",
+                    "tool_call_id": tool_call.get("id"),
+                    "content": str(func_results), # Content must be string
+                }
+            except Exception as error:
+                tool_message = {
+                    "role": "tool",
+                    "tool_call_id": tool_call.get("id"),
+                    "content": f"Error executing tool: {str(error)}",
+                }
+                
+            messages.append(tool_message)
+            # the tool message travels as structured `extra`, serialized by the sink
+            logger.bind(tool=tool_message).info("tool response")
 
-    if content:
-        # Simple heuristic or try/except JSON parse to find "finished": true
-        try:
-            # Attempt to parse json if the model output pure json or markdown json
-            clean_content = content.strip()
-            if clean_content.startswith("```"):
-                 clean_content = clean_content.split("\n", 1)[-1].rsplit("\n", 1)[0]
-            
-            data = json.loads(clean_content)
-            if data.get("finished") is True:
-                logger.success(f"Task Finished: {data.get('message')}")
-                break
-        except json.JSONDecodeError:
-            pass # Continue if not valid json or not finished
-    
-    tool_calls = response.get("tool_calls", []) or []
-    for tool_call in tool_calls:
-        if tool_call["type"] != "function":
-            continue
-        try:
-            func_name = tool_call["function"]["name"]
-            args_raw = tool_call["function"]["arguments"]
-            
-            if isinstance(args_raw, str):
-                func_inputs = json.loads(args_raw)
-            else:
-                func_inputs = args_raw
-            
-            tool_instance = registry.get(func_name)
-            if tool_instance:
-                logger.debug(f"Executing tool {func_name}")
-                func_results = tool_instance(**func_inputs)
-            else:
-                func_results = f"Error: Tool {func_name} not found."
+    return messages
 
-            tool_message = {
-                "role": "tool",
-                "tool_call_id": tool_call.get("id"),
-                "content": str(func_results), # Content must be string
-            }
-        except Exception as error:
-            tool_message = {
-                "role": "tool",
-                "tool_call_id": tool_call.get("id"),
-                "content": f"Error executing tool: {str(error)}",
-            }
-            
-        messages.append(tool_message)
-        logger.info(f"tool response {json.dumps(tool_message, indent=2)}")
\ No newline at end of file
+# ================ 3. Run all files concurrently ================
+# each file has its own messages, the GroqClient (pooled connections) is shared
+with ThreadPoolExecutor(max_workers=max(1, min(8, len(files_under_test)))) as executor:
+    for file_under_test, messages in zip(files_under_test, executor.map(run_for_file, files_under_test)):
+        logger.info(f"[{file_under_test}] Final Response: {messages[-1].get('content')}")
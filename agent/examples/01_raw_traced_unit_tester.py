@@ -2,15 +2,22 @@
 This is an Agent who given certain python files will write unit tests using pytest 
 And will execute them and report result
 """
-import json
+import textwrap
 import os
+from dotenv import load_dotenv
 from loguru import logger
+from agent.base import FINISHED_RE
+from json_utils import json_loads
 from tools.registry import ToolRegistry
 import tools.toolkit.web_explorer as web_explorer_tools
 from tools.toolkit.builtin import code_tools, file_tools, json_tools
 from llm.groq_client import GroqClient, LLMConfig
 from llm.config import LLMProvider
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# langfuse keys may live in .env (GroqClient only loads it when the client is created)
+load_dotenv()
 
 # --- Robust Langfuse Setup ---
 # We define the Dummy class first so it's always available
@@ -69,13 +76,16 @@ def _execute_tool_logic(registry, tool_call):
     try:
         func_name = tool_call["function"]["name"]
         args_raw = tool_call["function"]["arguments"]
-        func_inputs = json.loads(args_raw) if isinstance(args_raw, str) else args_raw
+        func_inputs = json_loads(args_raw) if isinstance(args_raw, str) else args_raw
             
         tool_instance = registry.get(func_name)
         if not tool_instance:
              raise ValueError(f"Tool {func_name} not found")
              
-        func_results = tool_instance(**func_inputs)
+        if tool_instance.func.__module__ == web_explorer_tools.__name__:
+            func_results = browser_executor.submit(tool_instance, **func_inputs).result()
+        else:
+            func_results = tool_instance(**func_inputs)
 
         return {
             "role": "tool",
@@ -102,7 +112,7 @@ client = GroqClient(config)
 files_under_test = ["tools/toolkit/web_explorer.py"]
 tests_output_directory_path = "tools/llm_tests"
 
-messages = [
+messages_template = [
     {
         "role": "system", "content": """
         You are a highly skilled QA Automation Agent with expertise in Python programming, unit testing (using Pytest), and modern GenAI tools. 
@@ -125,61 +135,81 @@ messages = [
     }
 ]
 
+# one registry shared by all files (tools are only read while running)
 registry = ToolRegistry()
 registry.register_from_module(web_explorer_tools)
 registry.register_from_module(code_tools)
 registry.register_from_module(file_tools)
 registry.register_from_module(json_tools)
+# playwright's sync API only works on the thread that started it, so every browser tool call
+# goes through this single thread while the files run in parallel
+browser_executor = ThreadPoolExecutor(max_workers=1)
 
-messages[0]["content"] = messages[0]["content"].replace("{tools}", registry.to_string())
-messages[1]["content"] = messages[1]["content"].format(
-    files_under_test=str(files_under_test),
-    tests_output_directory_path=str(tests_output_directory_path)
-)
-
-# Start Trace
-root_span = langfuse.trace(name="unit-tester-run", metadata={"files": files_under_test})
+# dedent/strip once so the system prefix is byte-stable between runs (provider prefix caching)
+messages_template[0]["content"] = textwrap.dedent(messages_template[0]["content"]).strip().replace("{tools}", registry.to_string()) + "\n"
 
-# ================ 2. Starts Iterations ================
+client_tools = registry.to_client_tools(config.provider)
 max_iterations = 20
-iteration = 0
-while True:
-    iteration += 1
-    logger.info(f"Iteration {iteration}")
-    
-    with root_span.span(name=f"iteration-{iteration}"):
-        client_tools = registry.to_client_tools(config.provider)
-        
-        # 1. GENERATE
-        response = traced_client_generate(client, messages, tools=client_tools)
-        messages.append(response)
-        
-        # Safe Dictionary Access
-        content = response.get('content') or ""
-        tool_calls = response.get('tool_calls') or []
-        
-        logger.info(f"Assistant: {content[:100]}...")
 
-        if iteration > max_iterations:
-            break
-            
-        # Check finished
-        if content:
-            try:
-                clean_content = content.strip()
-                if clean_content.startswith("```"):
-                     clean_content = clean_content.split("\n", 1)[-1].rsplit("\n", 1)[0]
-                data = json.loads(clean_content)
-                if data.get("finished") is True:
-                    logger.success("Task Finished")
-                    break
-            except:
-                pass
+# ================ 2. Starts Iterations (per file) ================
+def run_for_file(file_under_test: str) -> list[dict]:
+    """ Run the traced agent loop for a single file, returns its messages """
+    messages = [
+        messages_template[0],
+        {
+            "role": "user", "content": messages_template[1]["content"].format(
+                files_under_test=str([file_under_test]),
+                tests_output_directory_path=str(tests_output_directory_path)
+            )
+        }
+    ]
+
+    # Start Trace (one per file)
+    root_span = langfuse.trace(name="unit-tester-run", metadata={"files": [file_under_test]})
+
+    iteration = 0
+    while True:
+        iteration += 1
+        logger.info(f"[{file_under_test}] Iteration {iteration}")
         
-        # 2. EXECUTE TOOLS
-        for tool_call in tool_calls:
-            tool_msg = traced_tool_execution(registry, tool_call)
-            messages.append(tool_msg)
+        with root_span.span(name=f"iteration-{iteration}"):
+            # 1. GENERATE
+            response = traced_client_generate(client, messages, tools=client_tools)
+            messages.append(response)
+            
+            # Safe Dictionary Access
+            content = response.get('content') or ""
+            tool_calls = response.get('tool_calls') or []
             
-# Close the trace
-root_span.update(output=messages[-1])
\ No newline at end of file
+            logger.info(f"[{file_under_test}] Assistant: {content[:100]}...")
+
+            if iteration > max_iterations:
+                break
+                
+            # Check finished
+            if content and FINISHED_RE.search(content):
+                try:
+                    clean_content = content.strip()
+                    if clean_content.startswith("```"):
+                         clean_content = clean_content.split("\n", 1)[-1].rsplit("\n", 1)[0]
+                    data = json_loads(clean_content)
+                    if data.get("finished") is True:
+                        logger.success(f"[{file_under_test}] Task Finished")
+                        break
+                except:
+                    pass
+            
+            # 2. EXECUTE TOOLS
+            for tool_call in tool_calls:
+                tool_msg = traced_tool_execution(registry, tool_call)
+                messages.append(tool_msg)
+                
+    # Close the trace
+    root_span.update(output=messages[-1])
+    return messages
+
+# ================ 3. Run all files concurrently ================
+# each file has its own messages & trace, the GroqClient (pooled connections) is shared
+with ThreadPoolExecutor(max_workers=max(1, min(8, len(files_under_test)))) as executor:
+    for file_under_test, messages in zip(files_under_test, executor.map(run_for_file, files_under_test)):
+        logger.info(f"[{file_under_test}] Final Response: {(messages[-1].get('content') or '')[:100]}...")
@@ -1,54 +1,68 @@
-from ..base import Agent, BaseAgentState, LLMClient, ToolRegistry
+from ..base import Agent, BaseAgentState, LLMClient, MessageLog, ToolRegistry, build_system_prompt
 from tools.toolkit.builtin import code_tools, file_tools, json_tools
-from pathlib import Path
+from typing import Optional
+
+
+_REGISTRY: Optional[ToolRegistry] = None
+
+
+def _get_registry() -> ToolRegistry:
+    """ Tool registry shared by every SimpleUnitTesterAgent (tools & schemas built once per process) """
+    global _REGISTRY
+    if _REGISTRY is None:
+        registry = ToolRegistry()
+        registry.register_from_module(code_tools)
+        registry.register_from_module(file_tools)
+        registry.register_from_module(json_tools)
+        _REGISTRY = registry
+    return _REGISTRY
 
 
 class SimpleUnitTesterAgent(Agent):
-    def __init__(self, llm: LLMClient,  max_iterations: int = 100):
-        tool_registry = ToolRegistry
-        tool_registry.register_from_module(code_tools)
-        tool_registry.register_from_module(file_tools)
-        tool_registry.register_from_module(json_tools)
-        
+    def __init__(self, llm: LLMClient,  max_iterations: int = 100, context_max_tokens: Optional[int] = None, stream_until_finish: bool = False):
+        tool_registry = _get_registry()
 
-        super().__init__(llm, tool_registry, max_iterations)
+        super().__init__(llm, tool_registry, max_iterations, context_max_tokens=context_max_tokens, stream_until_finish=stream_until_finish)
         
+        # template every query starts from (only copied, never run)
         self.inital_state = BaseAgentState()
         
-        # 1: Read System Prompt
-        prompt_path = Path("prompts/unit_tester_v1.txt")
-        if prompt_path.exists():
-            sys_template = prompt_path.read_text(encoding="utf-8")
-        else:
-            sys_template = "You are a QA Agent. Tools: {tools}"
-            
-        # 2: Format Prompt with Tools
-        formatted_prompt = sys_template.replace("{tools}", self.tool_registry.to_string())
-        
-        # 3: Add system message
-        self.inital_state.add_message(role="system", content=formatted_prompt)
+        # System prompt (template read & formatted once per process, normalized so the provider can cache the prefix)
+        formatted_prompt = build_system_prompt("prompts/unit_tester_v1.txt", "You are a QA Agent. Tools: {tools}", self.tool_registry.to_string())
+        self.inital_state.messages.append(self.set_system_prompt(formatted_prompt))
     
     def start_point(self, user_query) -> BaseAgentState:
         """ Start Point of State for example start of user query or anything """
-        state = self.inital_state
+        # fresh state per query (copies of the system message), concurrent `aiterate` calls never share one
+        state = BaseAgentState(messages=MessageLog(dict(m) for m in self.inital_state.messages))
         state.add_message(role="user", content=user_query)
 
         return state
     
     def run(self, state: BaseAgentState) -> BaseAgentState:
         response = self.llm_generate(state)
+        tool_calls = self._apply_response(state, response)
+        if tool_calls:
+            state.messages.extend(self.call_tools(tool_calls, state.tool_cache))
+        
+        return state
+
+    async def arun(self, state: BaseAgentState) -> BaseAgentState:
+        response = await self.allm_generate(state)
+        tool_calls = self._apply_response(state, response)
+        if tool_calls:
+            state.messages.extend(await self.call_tools_async(tool_calls, state.tool_cache))
 
+        return state
 
-        state.add_message(role="assistant", content=response.get("content"), tool_calls=response.get("tool_calls"))
+    def _apply_response(self, state: BaseAgentState, response: dict) -> list:
+        """ Record the assistant response & check stop condition, returns the tool calls to execute """
+        # a stream cut after the final report may end inside a tool call, don't run half-streamed arguments
+        tool_calls = None if response.get("stopped_early") else response.get("tool_calls")
+        state.add_message(role="assistant", content=response.get("content"), tool_calls=tool_calls)
 
         content = response.get("content") or ""
         if "finished" in content.lower() and "message" in content.lower():
              state.is_finished = True
 
-        tool_calls = response.get("tool_calls")
-        if tool_calls:
-            for tc in tool_calls:
-                tool_msg = self.call_tool(tc)
-                state.messages.append(tool_msg)
-        
-        return state
+        return tool_calls
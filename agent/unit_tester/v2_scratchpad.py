@@ -1,46 +1,151 @@
-from ..base import Agent, BaseAgentState, LLMClient, ToolRegistry
+from ..base import FINISHED_RE, FINISHED_REPORT_RE, Agent, BaseAgentState, LLMClient, MessageLog, ToolRegistry, build_system_prompt
+from json_utils import json_loads
 from tools.toolkit.builtin import code_tools, file_tools, json_tools
-from pathlib import Path
 from loguru import logger
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import atexit
 import json
 
+# what side-effect tools (write_file, create_folder, ...) return on success
+SPECULATIVE_TOOL_RESULT = str({"success": True, "result": True})
+# speculative generations of the sync `run` (sync client, no event loop), the tools keep the caller's thread
+_SPECULATION_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="speculation")
+atexit.register(_SPECULATION_EXECUTOR.shutdown)
+
+
 class ScratchpadUnitTesterAgent(Agent):
-    def __init__(self, llm: LLMClient,  max_iterations: int = 100):
+    # tools whose successful output is known upfront, so the next step can be planned while they run
+    speculative_tools = {"write_file", "create_folder", "remove_file", "remove_folder"}
+
+    def __init__(self, llm: LLMClient,  max_iterations: int = 100, speculate: bool = False, stream_until_finish: bool = False):
         tool_registry = ToolRegistry()
         tool_registry.register_from_module(code_tools)
         tool_registry.register_from_module(file_tools)
         tool_registry.register_from_module(json_tools)
         
-        super().__init__(llm, tool_registry, max_iterations)
-        
-        self.inital_state = BaseAgentState()
+        super().__init__(llm, tool_registry, max_iterations, stream_until_finish=stream_until_finish)
+        self.speculate = speculate
         
-        prompt_path = Path("prompts/unit_tester_v2.txt")
-        if prompt_path.exists():
-            sys_template = prompt_path.read_text(encoding="utf-8")
-        else:
-            sys_template = "You are a QA Agent. Output JSON. Tools: {tools}"
-            
-        formatted_prompt = sys_template.replace("{tools}", self.tool_registry.to_string())
+        # template read & formatted once per process
+        formatted_prompt = build_system_prompt("prompts/unit_tester_v2.txt", "You are a QA Agent. Output JSON. Tools: {tools}", self.tool_registry.to_string())
         
-        self.inital_state.add_message(role="system", content=formatted_prompt)
+        # messages every query starts with (normalized so the provider can cache the prefix)
+        self.system_messages: tuple[dict, ...] = (self.set_system_prompt(formatted_prompt),)
     
     def start_point(self, user_query) -> BaseAgentState:
-        # Use model_copy to ensure we don't mutate the base state template
-        state = self.inital_state.model_copy(deep=True)
+        # shallow copy per query: a state editing its system message can't leak into other queries,
+        # the (long) prompt string itself is still shared
+        state = BaseAgentState(messages=MessageLog(dict(m) for m in self.system_messages))
         state.add_message(role="user", content=user_query)
+        state.anchor_count = len(state.messages)
         return state
     
     def run(self, state: BaseAgentState) -> BaseAgentState:
-        response = self.llm_generate(state)
-        content = response.get("content") or ""
-        tool_calls = response.get("tool_calls") or []
+        response = state.speculative_response or self.llm_generate(state)
+        state.speculative_response = None
+        tool_calls = self._apply_response(state, response)
+        if state.is_finished:
+            # trailing tool calls sent with the final report are dropped (see prompt)
+            return state
+        if tool_calls and self._can_speculate(tool_calls):
+            state.messages.extend(self._call_tools_speculative_sync(state, tool_calls))
+        elif tool_calls:
+            # each result is a dictionary: {'role': 'tool', ...} in the same order as tool_calls
+            state.messages.extend(self.call_tools(tool_calls, state.tool_cache))
         
-        persistent_messages = [
-            msg for msg in state.messages 
-            if msg["role"] in ["system", "user"]
+        return state
+
+    async def arun(self, state: BaseAgentState) -> BaseAgentState:
+        response = state.speculative_response or await self.allm_generate(state)
+        state.speculative_response = None
+        tool_calls = self._apply_response(state, response)
+        if state.is_finished:
+            # trailing tool calls sent with the final report are dropped (see prompt)
+            return state
+        if tool_calls and self._can_speculate(tool_calls):
+            state.messages.extend(await self._call_tools_speculative(state, tool_calls))
+        elif tool_calls:
+            state.messages.extend(await self.call_tools_async(tool_calls, state.tool_cache))
+
+        return state
+
+    def _can_speculate(self, tool_calls: list) -> bool:
+        return (
+            self.speculate
+            and all(tc['function']['name'] in self.speculative_tools for tc in tool_calls)
+        )
+
+    async def _call_tools_speculative(self, state: BaseAgentState, tool_calls: list) -> list[dict]:
+        """
+        Execute tool calls (in order) while generating the next step, assuming every tool succeeds.
+        The speculative response is kept (in `state.speculative_response`) only if the real
+        tool results match the assumed ones, otherwise it's cancelled on the first mismatch.
+        """
+        llm_task = asyncio.create_task(self.allm_generate(self._speculative_state(state, tool_calls)))
+
+        # the tools have side effects, they run one after the other in order, only the LLM call overlaps them
+        results = []
+        consistent = True
+        for tc in tool_calls:
+            result = await self.call_tool_async(tc, cache=state.tool_cache)
+            results.append(result)
+            if consistent and result["content"] != SPECULATIVE_TOOL_RESULT:
+                consistent = False
+                llm_task.cancel()
+                await asyncio.gather(llm_task, return_exceptions=True)
+
+        if consistent:
+            try:
+                state.speculative_response = await llm_task
+                state.speculation_hits += 1
+            except Exception as e:
+                logger.warning(f"Speculative generation failed: {e}")
+                state.speculation_misses += 1
+        else:
+            state.speculation_misses += 1
+
+        return results
+
+    def _call_tools_speculative_sync(self, state: BaseAgentState, tool_calls: list) -> list[dict]:
+        """
+        `_call_tools_speculative` for the sync `run`: the next step is generated with the sync client in a
+        thread while the tools run in order here. A running sync call can't be interrupted, on a mismatch its
+        response is dropped.
+        """
+        llm_future = _SPECULATION_EXECUTOR.submit(self.llm_generate, self._speculative_state(state, tool_calls))
+
+        results = [self.call_tool(tc, state.tool_cache) for tc in tool_calls]
+        if all(result["content"] == SPECULATIVE_TOOL_RESULT for result in results):
+            try:
+                state.speculative_response = llm_future.result()
+                state.speculation_hits += 1
+            except Exception as e:
+                logger.warning(f"Speculative generation failed: {e}")
+                state.speculation_misses += 1
+        else:
+            llm_future.cancel()
+            state.speculation_misses += 1
+
+        return results
+
+    @staticmethod
+    def _speculative_state(state: BaseAgentState, tool_calls: list) -> BaseAgentState:
+        """ State as it will be if every tool call succeeds """
+        predicted = [
+            {"role": "tool", "tool_call_id": tc['id'], "content": SPECULATIVE_TOOL_RESULT}
+            for tc in tool_calls
         ]
-        state.messages = persistent_messages
+        return BaseAgentState(messages=state.messages + predicted)
+
+    def _apply_response(self, state: BaseAgentState, response: dict) -> list:
+        """ Prune scratchpad, record the assistant response & check stop condition, returns the tool calls to execute """
+        content = response.get("content") or ""
+        # a stream cut after the final report may end inside a tool call, don't run half-streamed arguments
+        tool_calls = [] if response.get("stopped_early") else response.get("tool_calls") or []
+        
+        # keep only system/user anchors (truncate in place, no rebuild of the list)
+        del state.messages[state.anchor_count:]
         
         # Add the new assistant response (which holds the current scratchpad state)
         state.add_message(
@@ -49,13 +154,30 @@ class ScratchpadUnitTesterAgent(Agent):
             tool_calls=tool_calls
         )
 
+        # no stop marker -> no need to parse the JSON
+        if not FINISHED_RE.search(content):
+            return tool_calls
+
+        # generation was cut right after the report, the JSON is incomplete on purpose
+        if response.get("stopped_early"):
+            state.is_finished = True
+            report = FINISHED_REPORT_RE.search(content).group("message")
+            try:
+                # un-escape the JSON string value
+                report = json_loads('"' + report + '"')
+            except ValueError:
+                # not a valid JSON string (e.g. raw newlines), keep it as streamed
+                pass
+            logger.info(f"Agent finished. Report: {report}")
+            return tool_calls
+
         try:
             # Basic cleanup for markdown code blocks (```json ... ```)
             clean_content = content.strip()
             if clean_content.startswith("```"):
                 clean_content = clean_content.split("\n", 1)[-1].rsplit("\n", 1)[0]
             
-            data = json.loads(clean_content)
+            data = json_loads(clean_content)
             
             if data.get("finished") is True:
                 state.is_finished = True
@@ -66,10 +188,4 @@ class ScratchpadUnitTesterAgent(Agent):
         except Exception as e:
             logger.error(f"Error checking stop condition: {e}")
 
-        if tool_calls:
-            for tool_call in tool_calls:
-                # This returns a dictionary: {'role': 'tool', ...}
-                tool_msg = self.call_tool(tool_call)
-                state.messages.append(tool_msg)
-        
-        return state
\ No newline at end of file
+        return tool_calls
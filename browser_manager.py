@@ -1,4 +1,9 @@
-from playwright.sync_api import sync_playwright, Browser, Page, Playwright
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+# playwright is only imported when the first page is requested (it's heavy, and most tools never need it)
+if TYPE_CHECKING:
+    from playwright.sync_api import Browser, Page, Playwright
 
 class BrowserManager:
     """Manages browser lifecycle properly with context manager support."""
@@ -11,6 +16,7 @@ class BrowserManager:
     def start(self):
         """Initialize browser if not already running."""
         if self._browser is None:
+            from playwright.sync_api import sync_playwright
             self._playwright = sync_playwright().start()
             self._browser = self._playwright.chromium.launch(headless=True)
         return self._browser
@@ -0,0 +1,8 @@
+"""
+JSON helpers shared by the agents, LLM clients & tools.
+"""
+import orjson
+
+# orjson parses several times faster than the stdlib,
+# its JSONDecodeError subclasses json.JSONDecodeError (a ValueError) so callers catch either
+json_loads = orjson.loads
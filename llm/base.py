@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import Iterator
+from typing import Iterator, List, Optional
+import asyncio
+import re
 from .config import LLMConfig
 
 class LLMClient(ABC):
@@ -20,6 +22,24 @@ class LLMClient(ABC):
     def __init__(self, config: LLMConfig):
         self.config = config
 
+    def close(self):
+        """
+        Release resources (connection pools, ...), no-op by default.
+        """
+
+    async def aclose(self):
+        """
+        Async version of `close`.
+        """
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
     @abstractmethod
     def generate(self, messages: [dict[str, str]]) -> dict:
         """
@@ -27,6 +47,26 @@ class LLMClient(ABC):
         """
         raise NotImplementedError
 
+    async def agenerate(self, messages: [dict[str, str]], tools: Optional[List[dict]] = None) -> dict:
+        """
+        Async version of `generate`.
+        Default runs `generate` in a worker thread, clients with a native async SDK should override it.
+        """
+        return await asyncio.to_thread(self.generate, messages, tools=tools)
+
+    async def agenerate_many(self, messages_list: List[List[dict]], tools: Optional[List[dict]] = None, max_concurrency: int = 8) -> List[dict]:
+        """
+        Fan out independent prompts with `agenerate` (at most `max_concurrency` in flight),
+        results keep the order of `messages_list`.
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def _generate(messages):
+            async with semaphore:
+                return await self.agenerate(messages, tools=tools)
+
+        return await asyncio.gather(*[_generate(messages) for messages in messages_list])
+
     @abstractmethod
     def stream(self, messages: [dict[str, str]]) -> Iterator[dict]:
         """
@@ -36,4 +76,81 @@ class LLMClient(ABC):
         or
         { "type": "content", "token": "..."}
         """
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    def stream_generate(self, messages: [dict[str, str]], tools: Optional[List[dict]] = None, stop_pattern: Optional[re.Pattern] = None) -> dict:
+        """
+        Build the same response dict as `generate` from `stream` deltas.
+        If `stop_pattern` matches the content streamed so far, the stream is closed (generation cancelled)
+        and the partial response is returned with `"stopped_early": True`.
+        """
+        response = _StreamedResponse(stop_pattern)
+        deltas = self.stream(messages, tools=tools)
+        try:
+            for delta in deltas:
+                if response.add(delta):
+                    break
+        finally:
+            if hasattr(deltas, "close"):
+                deltas.close()
+        return response.to_dict()
+
+    async def astream_generate(self, messages: [dict[str, str]], tools: Optional[List[dict]] = None, stop_pattern: Optional[re.Pattern] = None) -> dict:
+        """
+        Async version of `stream_generate`, reads the client's `astream` when it has one
+        (runs `stream_generate` in a worker thread otherwise).
+        """
+        astream = getattr(self, "astream", None)
+        if astream is None:
+            return await asyncio.to_thread(self.stream_generate, messages, tools=tools, stop_pattern=stop_pattern)
+
+        response = _StreamedResponse(stop_pattern)
+        deltas = astream(messages, tools=tools)
+        try:
+            async for delta in deltas:
+                if response.add(delta):
+                    break
+        finally:
+            if hasattr(deltas, "aclose"):
+                await deltas.aclose()
+        return response.to_dict()
+
+
+class _StreamedResponse:
+    """ Accumulates `stream` deltas into the response dict `generate` returns """
+    __slots__ = ("stop_pattern", "role", "content", "tool_calls", "stopped_early")
+
+    def __init__(self, stop_pattern: Optional[re.Pattern] = None):
+        self.stop_pattern = stop_pattern
+        self.role = "assistant"
+        self.content = ""
+        self.tool_calls: dict[int, dict] = {}
+        self.stopped_early = False
+
+    def add(self, delta: dict) -> bool:
+        """ Merge one delta, returns True once `stop_pattern` matched (the stream should be closed) """
+        self.role = delta.get("role") or self.role
+        piece = delta.get("content")
+        if piece:
+            self.content += piece
+            # patterns end on a closing quote, so only re-check when one arrives
+            if self.stop_pattern is not None and '"' in piece and self.stop_pattern.search(self.content):
+                self.stopped_early = True
+                return True
+        for tc in delta.get("tool_calls") or []:
+            slot = self.tool_calls.setdefault(tc.get("index") or 0, {
+                "id": None, "type": "function", "function": {"name": "", "arguments": ""}
+            })
+            slot["id"] = tc.get("id") or slot["id"]
+            function = tc.get("function") or {}
+            slot["function"]["name"] += function.get("name") or ""
+            slot["function"]["arguments"] += function.get("arguments") or ""
+        return False
+
+    def to_dict(self) -> dict:
+        response_dict = {"role": self.role, "content": self.content or None}
+        if self.tool_calls:
+            response_dict["tool_calls"] = [self.tool_calls[i] for i in sorted(self.tool_calls)]
+        if self.stopped_early:
+            response_dict["stopped_early"] = True
+        return response_dict
@@ -25,4 +25,6 @@ class LLMConfig(BaseModel):
     
     max_tokens: int = Field(default=4096, description="Maximum number of tokens to generate")    
     
-    reasoning_effort: str = Field(default="medium", description="Effort level for reasoning models (e.g. o1/o3)")
\ No newline at end of file
+    reasoning_effort: str = Field(default="medium", description="Effort level for reasoning models (e.g. o1/o3)")
+
+    semantic_cache_threshold: Optional[float] = Field(default=None, ge=0.0, le=1.0, description="Cosine similarity above which a paraphrased user prompt reuses a cached response (None = disabled, needs sentence-transformers)")
@@ -1,27 +1,162 @@
+import asyncio
+import atexit
+import copy
+import functools
+import hashlib
+import json
 import os
-from typing import Iterator, List, Optional
-from dotenv import load_dotenv
-from groq import Groq, BadRequestError
+import threading
+from cachetools import TTLCache
+from typing import AsyncIterator, Iterator, List, Optional
+from groq import Groq, AsyncGroq, APIError, BadRequestError, DefaultHttpxClient, DefaultAsyncHttpxClient
+import httpx
+from json_utils import json_loads
 from .base import LLMClient
 from .config import LLMConfig
 
-# 1: load dotenv
-load_dotenv()
+# end of a raw SSE stream (see `GroqClient._parse_sse_line`)
+_SSE_DONE = object()
+
+# .env is read by the first client, not at import
+_dotenv_loaded = False
+
+def _load_dotenv_once():
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _dotenv_loaded = True
+
+# HTTP/2 needs the optional `h2` package (pip install httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_ENABLED = True
+except ImportError:
+    HTTP2_ENABLED = False
+
+# one keep-alive pool for the whole process, every GroqClient reuses its connections
+# (no new TCP+TLS handshake per client/request), closed at interpreter exit
+CONNECTION_LIMITS = httpx.Limits(max_connections=2000, max_keepalive_connections=1500)
+_HTTP_CLIENT = DefaultHttpxClient(http2=HTTP2_ENABLED, limits=CONNECTION_LIMITS, timeout=httpx.Timeout(120.0))
+atexit.register(_HTTP_CLIENT.close)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_embedder(model_name: str):
+    """ Load a sentence-transformers model once per process (heavy import, only on first use) """
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+class SemanticCache:
+    """
+    Similarity tier behind the exact-match cache: the last user message is embedded and
+    a stored response is reused when its prompt is a close paraphrase (cosine > threshold).
+    Only the opening request of a query is matched (last message from the user), and only
+    against entries with the exact same preceding messages, model & tools.
+    """
+    def __init__(self, threshold: float = 0.92, model_name: str = "all-MiniLM-L6-v2", max_entries: int = 1024):
+        self.threshold = threshold
+        self.model_name = model_name
+        self.max_entries = max_entries
+        # context key -> (unit-norm embeddings [n, dim] float32, responses)
+        self._entries: dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def embed(self, text: str):
+        import numpy as np
+        embedding = np.asarray(_load_embedder(self.model_name).encode(text), dtype=np.float32)
+        # normalized once, so similarity is a plain dot product
+        return embedding / (np.linalg.norm(embedding) or 1.0)
+
+    def query_for(self, context_key: str, messages: List[dict]) -> Optional[tuple]:
+        """ (context_key, embedding) of the request, None if it can't be matched semantically """
+        if not messages or messages[-1].get("role") != "user":
+            return None
+        return context_key, self.embed(messages[-1].get("content") or "")
+
+    def lookup(self, query: Optional[tuple]) -> Optional[dict]:
+        if query is None:
+            return None
+        context_key, embedding = query
+        with self._lock:
+            entry = self._entries.get(context_key)
+            if entry is None:
+                return None
+            embeddings, responses = entry
+            sims = embeddings @ embedding
+            best = int(sims.argmax())
+            if sims[best] <= self.threshold:
+                return None
+            return copy.deepcopy(responses[best])
+
+    def store(self, query: Optional[tuple], response_dict: dict):
+        if query is None:
+            return
+        import numpy as np
+        context_key, embedding = query
+        with self._lock:
+            embeddings, responses = self._entries.get(context_key, (np.empty((0, embedding.shape[0]), dtype=np.float32), []))
+            embeddings = np.vstack([embeddings, embedding])[-self.max_entries:]
+            responses = (responses + [copy.deepcopy(response_dict)])[-self.max_entries:]
+            self._entries[context_key] = (embeddings, responses)
+
 
 class GroqClient(LLMClient):
-    def __init__(self, config: LLMConfig):
+    def __init__(self, config: LLMConfig, maxsize: int = 256, ttl: float = 3600):
         super().__init__(config)
+        # exact-match response cache (LRU, entries expire after `ttl` seconds), only used for deterministic calls (temperature == 0)
+        self._cache_maxsize = maxsize
+        self._cache = TTLCache(maxsize=max(1, maxsize), ttl=ttl)
+        self._cache_lock = threading.Lock()
+        self._cache_stats = {"hits": 0, "misses": 0, "semantic_hits": 0}
+        self._semantic_cache = SemanticCache(config.semantic_cache_threshold) if config.semantic_cache_threshold is not None else None
         # 2: create groq client and set api_key from .env
+        _load_dotenv_once()
         api_key = os.environ.get("GROQ_API_KEY")
         if not api_key:
              # Fallback/Warning if needed
              pass
-        self.client = Groq(api_key=api_key)
+        self._async_session = DefaultAsyncHttpxClient(http2=HTTP2_ENABLED, limits=CONNECTION_LIMITS, timeout=httpx.Timeout(120.0))
+        self.client = Groq(api_key=api_key, http_client=_HTTP_CLIENT)
+        self.aclient = AsyncGroq(api_key=api_key, http_client=self._async_session)
+
+    def close(self):
+        """
+        Close the async connection pool, so `with GroqClient(...)` releases it too
+        (the sync one is shared by all clients and closed at exit). Prefer `await aclose()` inside an event loop.
+        """
+        if self._async_session.is_closed:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            try:
+                asyncio.run(self._async_session.aclose())
+            except RuntimeError:
+                # connections bound to an event loop that is already closed, nothing left to release
+                pass
+        else:
+            loop.create_task(self._async_session.aclose())
+
+    async def aclose(self):
+        """
+        Close the async connection pool (the sync one is shared by all clients and closed at exit).
+        """
+        await self._async_session.aclose()
     
     def generate(self, messages: List[dict], tools: Optional[List[dict]] = None) -> dict:
         """ 
         Send messages to Groq and return the full response dict.
         """
+        key = self._cache_key(messages, tools)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        query = self._semantic_query(messages, tools)
+        cached = self._semantic_get(query)
+        if cached is not None:
+            return cached
         try:
             response = self.client.chat.completions.create(
                 model=self.config.model_name,
@@ -32,17 +167,106 @@ class GroqClient(LLMClient):
                 max_tokens=self.config.max_tokens,
             )
         except BadRequestError as e:
-            # Handle specific Groq tool use errors (prevent crash)
-            error_body = getattr(e, 'body', {})
-            error_details = error_body.get('error', {})
-            if error_details.get('code') == 'tool_use_failed':
-                return {
-                    "role": "assistant",
-                    "content": f"System Error: The model failed to generate a valid tool call. Raw Error: {error_details.get('message')}"
-                }
-            # Re-raise other errors (like invalid API key)
-            raise e
-        
+            return self._handle_bad_request(e)
+        response_dict = self._to_response_dict(response)
+        if self._semantic_cache is not None:
+            self._semantic_cache.store(query, response_dict)
+        return self._cache_put(key, response_dict)
+
+    async def agenerate(self, messages: List[dict], tools: Optional[List[dict]] = None) -> dict:
+        """
+        Async version of `generate` using `AsyncGroq`, so many agents can share one event loop.
+        """
+        key = self._cache_key(messages, tools)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        # embedding the prompt (SentenceTransformer.encode) is CPU-bound, keep it off the event loop
+        query = None if self._semantic_cache is None else await asyncio.to_thread(self._semantic_query, messages, tools)
+        cached = self._semantic_get(query)
+        if cached is not None:
+            return cached
+        try:
+            response = await self.aclient.chat.completions.create(
+                model=self.config.model_name,
+                messages=messages,
+                tools=tools,
+                temperature=self.config.temperature,
+                top_p=self.config.top_p,
+                max_tokens=self.config.max_tokens,
+            )
+        except BadRequestError as e:
+            return self._handle_bad_request(e)
+        response_dict = self._to_response_dict(response)
+        if self._semantic_cache is not None:
+            self._semantic_cache.store(query, response_dict)
+        return self._cache_put(key, response_dict)
+
+    def _cache_key(self, messages: List[dict], tools: Optional[List[dict]]) -> Optional[str]:
+        """ SHA-256 of the canonical request, None when sampling makes responses non-deterministic """
+        if self._cache_maxsize <= 0 or self.config.temperature != 0:
+            return None
+        payload = {
+            "model": self.config.model_name,
+            "messages": messages,
+            "tools": tools,
+            "temperature": self.config.temperature,
+            "top_p": self.config.top_p,
+            "max_tokens": self.config.max_tokens,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _semantic_query(self, messages: List[dict], tools: Optional[List[dict]]) -> Optional[tuple]:
+        if self._semantic_cache is None:
+            return None
+        # everything but the last user message has to match exactly
+        context = {"model": self.config.model_name, "messages": messages[:-1], "tools": tools}
+        context_key = hashlib.sha256(json.dumps(context, sort_keys=True, default=str).encode()).hexdigest()
+        return self._semantic_cache.query_for(context_key, messages)
+
+    def _semantic_get(self, query: Optional[tuple]) -> Optional[dict]:
+        if query is None:
+            return None
+        cached = self._semantic_cache.lookup(query)
+        if cached is not None:
+            with self._cache_lock:
+                self._cache_stats["semantic_hits"] += 1
+        return cached
+
+    def _cache_get(self, key: Optional[str]) -> Optional[dict]:
+        if key is None:
+            return None
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is None:
+                self._cache_stats["misses"] += 1
+                return None
+            self._cache_stats["hits"] += 1
+        # callers may mutate the response (e.g. append it to messages)
+        return copy.deepcopy(cached)
+
+    def _cache_put(self, key: Optional[str], response_dict: dict) -> dict:
+        if key is not None:
+            with self._cache_lock:
+                # evicts the least recently used entry when full
+                self._cache[key] = copy.deepcopy(response_dict)
+        return response_dict
+
+    @staticmethod
+    def _handle_bad_request(e: BadRequestError) -> dict:
+        # Handle specific Groq tool use errors (prevent crash)
+        error_body = getattr(e, 'body', {})
+        error_details = error_body.get('error', {})
+        if error_details.get('code') == 'tool_use_failed':
+            return {
+                "role": "assistant",
+                "content": f"System Error: The model failed to generate a valid tool call. Raw Error: {error_details.get('message')}"
+            }
+        # Re-raise other errors (like invalid API key)
+        raise e
+
+    @staticmethod
+    def _to_response_dict(response) -> dict:
         # Extract only necessary fields to avoid sending unsupported metadata back to API
         msg_obj = response.choices[0].message
         
@@ -58,19 +282,124 @@ class GroqClient(LLMClient):
              
         return response_dict
     
+    @staticmethod
+    def _delta_to_dict(delta) -> dict:
+        # plain attribute reads, `model_dump()` per token walks every optional field of the pydantic model
+        out = {"content": delta.content}
+        if delta.role:
+            out["role"] = delta.role
+        if delta.tool_calls:
+            out["tool_calls"] = [
+                {
+                    "index": tc.index,
+                    "id": tc.id,
+                    "type": tc.type,
+                    "function": {
+                        "name": tc.function.name if tc.function else None,
+                        "arguments": tc.function.arguments if tc.function else None,
+                    },
+                }
+                for tc in delta.tool_calls
+            ]
+        return out
+
+    @staticmethod
+    def _parse_sse_line(line: str, request: httpx.Request):
+        """
+        Delta dict of one raw SSE line (None for keep-alive/event lines, `_SSE_DONE` at the end).
+        Same checks as the SDK's `Stream`, without building a `ChatCompletionChunk` per token.
+        """
+        if not line.startswith("data:"):
+            return None
+        data = line[5:].strip()
+        if data.startswith("[DONE]"):
+            return _SSE_DONE
+        chunk = json_loads(data)
+        error = chunk.get("error")
+        if error:
+            message = error.get("message") if isinstance(error, dict) else None
+            raise APIError(message=message or "An error occurred during streaming", request=request, body=error)
+        choices = chunk.get("choices")
+        if not choices:
+            return None
+        delta = choices[0].get("delta") or {}
+        delta.setdefault("content", None)
+        return delta
+
     def stream(self, messages: List[dict], tools: Optional[List[dict]] = None) -> Iterator[dict]:
-        stream = self.client.chat.completions.create(
-            model=self.config.model_name,
-            messages=messages,
-            tools=tools,
-            temperature=self.config.temperature,
-            top_p=self.config.top_p,
-            max_tokens=self.config.max_tokens,
-            stream=True
-        )
-        for chunk in stream:
-            if chunk.choices:
-                yield chunk.choices[0].delta.model_dump()
+        """
+        Stream the response deltas, parsed straight from the raw SSE lines (one JSON parse per token).
+        """
+        completions = self.client.chat.completions
+        if not hasattr(completions, "with_streaming_response"):
+            yield from self._stream_models(messages, tools)
+            return
+        try:
+            # leaving the block (consumer stopped early, or finished) closes the HTTP response so generation is cancelled
+            with completions.with_streaming_response.create(
+                model=self.config.model_name,
+                messages=messages,
+                tools=tools,
+                temperature=self.config.temperature,
+                top_p=self.config.top_p,
+                max_tokens=self.config.max_tokens,
+                stream=True
+            ) as response:
+                for line in response.iter_lines():
+                    delta = self._parse_sse_line(line, response.http_request)
+                    if delta is _SSE_DONE:
+                        break
+                    if delta is not None:
+                        yield delta
+        except BadRequestError as e:
+            # same fallback message as `generate` (the request is rejected before any delta)
+            yield self._handle_bad_request(e)
+
+    def _stream_models(self, messages: List[dict], tools: Optional[List[dict]] = None) -> Iterator[dict]:
+        """ `stream` through the SDK's pydantic chunks (SDKs without raw streaming responses) """
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.config.model_name,
+                messages=messages,
+                tools=tools,
+                temperature=self.config.temperature,
+                top_p=self.config.top_p,
+                max_tokens=self.config.max_tokens,
+                stream=True
+            )
+        except BadRequestError as e:
+            yield self._handle_bad_request(e)
+            return
+        try:
+            for chunk in stream:
+                if chunk.choices:
+                    yield self._delta_to_dict(chunk.choices[0].delta)
+        finally:
+            # consumer stopped early (or finished): close the HTTP response so generation is cancelled
+            stream.close()
+
+    async def astream(self, messages: List[dict], tools: Optional[List[dict]] = None) -> AsyncIterator[dict]:
+        """
+        Async version of `stream` using `AsyncGroq`, many streams can overlap on one event loop.
+        """
+        try:
+            async with self.aclient.chat.completions.with_streaming_response.create(
+                model=self.config.model_name,
+                messages=messages,
+                tools=tools,
+                temperature=self.config.temperature,
+                top_p=self.config.top_p,
+                max_tokens=self.config.max_tokens,
+                stream=True
+            ) as response:
+                async for line in response.iter_lines():
+                    delta = self._parse_sse_line(line, response.http_request)
+                    if delta is _SSE_DONE:
+                        break
+                    if delta is not None:
+                        yield delta
+        except BadRequestError as e:
+            yield self._handle_bad_request(e)
 
 if __name__ == "__main__":
     # Test block
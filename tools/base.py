@@ -13,6 +13,7 @@ class Tool:
         arguments (list): A list of arguments.
         outputs (str or list): The return type(s) of the wrapped function.
         session_id (str): Optional id for session *advanced to use for playwright or code etc...*
+        pure (bool): True if the tool only reads (no side effects), so its result can be reused for the same arguments.
     """
     def __init__(self,
                  name: str,
@@ -20,13 +21,25 @@ class Tool:
                  func: Callable,
                  arguments: list,
                  outputs: str,
-                 session_id: str = None):
+                 session_id: str = None,
+                 pure: bool = False):
         self.name = name
         self.description = description
         self.func = func
         self.arguments = arguments
         self.outputs = outputs
         self.session_id = session_id
+        self.pure = pure
+        # OpenAI-compatible schema, built once (tool definitions are static)
+        self._schema_dict: dict = None
+
+    def schema(self) -> dict:
+        """
+        Cached `to_openai_format()` (shared dict, don't mutate it).
+        """
+        if self._schema_dict is None:
+            self._schema_dict = self.to_openai_format()
+        return self._schema_dict
 
     def to_string(self) -> str:
         """
@@ -124,7 +137,7 @@ class Tool:
 
     def to_client_format(self, llm_provider: LLMProvider):
         if llm_provider in [LLMProvider.GROQ, LLMProvider.OPENAI] :
-            return self.to_openai_format()
+            return self.schema()
         elif llm_provider == LLMProvider.GEMINI:
             return self.to_gemini_format()
         
@@ -136,7 +149,8 @@ class Tool:
         if "session_id" in func_arg_names and self.session_id:
             kwargs["session_id"] = self.session_id
             
-        logger.debug(f"calling tool {self.name} with {args} {kwargs}")
+        # args are only formatted when DEBUG is enabled (they may hold whole file contents)
+        logger.debug("calling tool {} with {} {}", self.name, args, kwargs)
         return self.func(*args, **kwargs)
         
     def __str__(self) -> str:
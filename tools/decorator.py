@@ -1,43 +1,62 @@
+import functools
 import inspect
 from .base import Tool
 
-def tool(name: str = None, description: str = None):
+
+@functools.lru_cache(maxsize=None)
+def _type_name(annotation) -> str:
+    """ Display name of an annotation (`str`, `int`, ...), the same types repeat across all tools """
+    return annotation.__name__ if hasattr(annotation, '__name__') else str(annotation)
+
+
+def tool(name: str = None, description: str = None, pure: bool = False):
     def wrapper(func):
         """
         A decorator that creates a Tool instance from the given function.
         """
-        # Get the function signature
-        signature = inspect.signature(func)
-
-        # Extract (param_name, param_annotation) pairs for inputs
-        arguments = []
-        for param in signature.parameters.values():
-            annotation_name = (
-                param.annotation.__name__
-                if hasattr(param.annotation, '__name__')
-                else str(param.annotation)
-            )
-            arguments.append((param.name, annotation_name)) # so your could Annoutation
+        # the function under `functools.wraps` decorators holds the real parameters
+        target = inspect.unwrap(func)
+        if (
+            inspect.isfunction(target)
+            and not hasattr(target, "__signature__")
+            and not target.__code__.co_flags & (inspect.CO_VARARGS | inspect.CO_VARKEYWORDS)
+        ):
+            # read the parameters straight from the code object & annotations dict
+            # (`inspect.signature` builds Parameter objects for every tool at import time)
+            code = target.__code__
+            annotations = target.__annotations__
+            param_names = code.co_varnames[:code.co_argcount + code.co_kwonlyargcount]
+
+            # Extract (param_name, param_annotation) pairs for inputs
+            arguments = [
+                (param_name, _type_name(annotations.get(param_name, inspect._empty)))
+                for param_name in param_names
+            ]
+            return_annotation = annotations.get('return', inspect._empty)
+        else:
+            # partials, bound methods, callable objects, *args/**kwargs...
+            signature = inspect.signature(func)
+            arguments = [(param.name, _type_name(param.annotation)) for param in signature.parameters.values()]
+            return_annotation = signature.return_annotation
 
         # Determine the return annotation
-        return_annotation = signature.return_annotation
         if return_annotation is inspect._empty:
             outputs = "No return annotation"
         else:
-            outputs = (
-                return_annotation.__name__
-                if hasattr(return_annotation, '__name__')
-                else str(return_annotation)
-            )
+            outputs = _type_name(return_annotation)
 
         func_description = description or func.__doc__ or "No description provided."
         func_name = name or func.__name__
 
-        return Tool(
+        t = Tool(
             name=func_name,
             description=func_description,
             func=func,
             arguments=arguments,
             outputs=outputs,
+            pure=pure,
         )
+        # build the schema at decoration time, not on the first LLM call
+        t.schema()
+        return t
     return wrapper
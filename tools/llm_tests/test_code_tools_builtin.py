@@ -27,6 +27,50 @@ def test_run_python_file_success(tmp_path: Path):
     assert "Hello stderr" in output
 
 
+def test_run_python_file_child_process_output(tmp_path: Path):
+    # Output of child processes (no trailing newline) and children reading stdin must not hang the run
+    script_path = tmp_path / "child.py"
+    script_content = textwrap.dedent("""
+    import subprocess, sys
+    subprocess.run([sys.executable, "-c", "import sys; sys.stdin.read()"])
+    subprocess.run([sys.executable, "-c", "import sys; sys.stdout.write('x')"])
+    """)
+    script_path.write_text(script_content)
+
+    result = run_python_file(str(script_path))
+    assert result["success"] is True
+    assert result["result"].startswith("Stdout:\nx\nStderr:")
+
+    # the worker is still usable afterwards
+    script_path.write_text("print('again')")
+    assert "again" in run_python_file(str(script_path))["result"]
+
+
+def test_run_python_file_runs_are_isolated(tmp_path: Path):
+    # State changed by one script (env vars, patched modules) must not leak into the next run
+    leaky = tmp_path / "leaky.py"
+    leaky.write_text("import json, os\nos.environ['LEAK'] = '1'\njson.dumps = lambda *a, **k: 'garbage'\n")
+    check = tmp_path / "check.py"
+    check.write_text("import json, os\nprint(os.environ.get('LEAK'), json.dumps([1]))\n")
+
+    assert run_python_file(str(leaky))["success"] is True
+    result = run_python_file(str(check))
+    assert result["success"] is True
+    assert "None [1]" in result["result"]
+
+
+def test_run_python_file_timeout(tmp_path: Path, monkeypatch):
+    from tools.toolkit.builtin import code_tools
+    monkeypatch.setattr(code_tools, "_RUN_TIMEOUT", 1)
+    script_path = tmp_path / "hang.py"
+    script_path.write_text("import time\nprint('started', flush=True)\ntime.sleep(60)\n")
+
+    result = run_python_file(str(script_path))
+    assert result["success"] is True
+    assert "started" in result["result"]
+    assert "Timed out after 1s" in result["result"]
+
+
 def test_run_python_file_not_found(tmp_path: Path):
     missing_path = tmp_path / "nonexistent.py"
     result = run_python_file(str(missing_path))
@@ -29,9 +29,14 @@ def mock_page():
 def test_goto_url(mock_close_page, mock_get_page, mock_page):
     from tools.toolkit import web_explorer
     mock_get_page.return_value = mock_page
-    out = web_explorer.goto_url("http://example.com")
+    out = web_explorer.goto_url("http://example.com", need_title=True)
     assert "Test Page Title" in out
     assert "Navigated" in out
+    mock_page.title.reset_mock()
+    out = web_explorer.goto_url("http://example.com")
+    assert "Navigated" in out
+    assert "http://example.com" in out
+    mock_page.title.assert_not_called()
 
 @patch(goto_url_path)
 def test_get_page_content_text(mock_get_page, mock_page):
@@ -40,6 +45,44 @@ def test_get_page_content_text(mock_get_page, mock_page):
     result = web_explorer.get_page_content(mode="text")
     assert "Hello Text Body" == result
 
+@patch(goto_url_path)
+def test_get_page_content_text_paginated(mock_get_page, mock_page):
+    from tools.toolkit import web_explorer
+    mock_get_page.return_value = mock_page
+    inner_text = mock_page.locator.return_value.inner_text
+    first = web_explorer.get_page_content(mode="text", max_chars=5)
+    assert first.startswith("Hello\n\n[truncated: characters 0-5 of 15")
+    assert "offset=5" in first
+    # later slices are served from the text read at offset 0
+    assert web_explorer.get_page_content(mode="text", max_chars=5, offset=5).startswith(" Text\n\n[truncated")
+    assert web_explorer.get_page_content(mode="text", max_chars=5, offset=10) == " Body"
+    assert inner_text.call_count == 1
+
+@patch(goto_url_path)
+def test_get_page_content_text_cache_invalidated_by_goto_url(mock_get_page, mock_page):
+    from tools.toolkit import web_explorer
+    mock_get_page.return_value = mock_page
+    web_explorer.get_page_content(mode="text", max_chars=5)
+    web_explorer.goto_url("http://example.com/other")
+    mock_page.locator.return_value.inner_text.return_value = "Other page text"
+    assert web_explorer.get_page_content(mode="text", max_chars=5, offset=6) == "page \n\n[truncated: characters 6-11 of 15, call again with offset=11 for more]"
+
+@patch(goto_url_path)
+def test_get_page_content_text_cache_invalidated_by_fill_input(mock_get_page, mock_page):
+    from tools.toolkit import web_explorer
+    mock_get_page.return_value = mock_page
+    web_explorer.get_page_content(mode="text", max_chars=5)
+    web_explorer.fill_input("#search", "query")
+    mock_page.locator.return_value.inner_text.return_value = "Results for query"
+    assert web_explorer.get_page_content(mode="text", max_chars=7, offset=12) == "query"
+
+@patch(goto_url_path)
+def test_get_page_content_text_invalid_range(mock_get_page, mock_page):
+    from tools.toolkit import web_explorer
+    mock_get_page.return_value = mock_page
+    assert "Invalid" in web_explorer.get_page_content(mode="text", offset=-1)
+    assert "Invalid" in web_explorer.get_page_content(mode="text", max_chars=0)
+
 @patch(goto_url_path)
 def test_get_page_content_html_content_method(mock_get_page, mock_page):
     from tools.toolkit import web_explorer
@@ -73,6 +116,8 @@ def test_screenshot(mock_get_page, mock_page):
     from tools.toolkit import web_explorer
     mock_get_page.return_value = mock_page
     out = web_explorer.screenshot(full_page=True)
+    assert out.startswith("data:image/jpeg;base64,")
+    out = web_explorer.screenshot(full_page=True, fmt="png")
     assert out.startswith("data:image/png;base64,")
 
 @patch(close_page_path)
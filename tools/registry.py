@@ -1,6 +1,6 @@
 import importlib
-from types import ModuleType
-from typing import Dict, List
+from types import MappingProxyType, ModuleType
+from typing import Dict, List, Mapping
 from loguru import logger
 from .base import Tool
 from llm.config import LLMProvider
@@ -14,6 +14,11 @@ class ToolRegistry:
     def __init__(self, session_id: str = None):
         self._tools: Dict[str, Tool] = {}
         self._session_id = session_id
+        # read-only live view of name -> tool, for hot loops (one dict lookup, no method call)
+        self.dispatch: Mapping[str, Tool] = MappingProxyType(self._tools)
+        # schemas/descriptions are rebuilt only when a tool is registered
+        self._client_tools_cache: Dict[LLMProvider, List[dict]] = {}
+        self._string_cache: str = None
         
     def register(self, tool: Tool):
         """
@@ -24,6 +29,8 @@ class ToolRegistry:
         logger.debug(f"register new tool {tool.name} and inject session `{self._session_id}`")
         tool.session_id = self._session_id
         self._tools[tool.name] = tool
+        self._client_tools_cache.clear()
+        self._string_cache = None
 
     def register_from_module(self, module: ModuleType):
         """
@@ -62,14 +69,21 @@ class ToolRegistry:
                 }
             }
         ]
+        (cached per provider, don't mutate the returned list)
         """
-        return [tool.to_client_format(llm_provider) for tool in self._tools.values()]
+        client_tools = self._client_tools_cache.get(llm_provider)
+        if client_tools is None:
+            client_tools = [tool.to_client_format(llm_provider) for tool in self._tools.values()]
+            self._client_tools_cache[llm_provider] = client_tools
+        return client_tools
     
     def to_string(self) -> [str]:
         """
         List all registered tools with metadata.
         """
-        return "\n".join(self.list_tools())
+        if self._string_cache is None:
+            self._string_cache = "\n".join(self.list_tools())
+        return self._string_cache
 
     def load_module(self, module_path: str):
         """
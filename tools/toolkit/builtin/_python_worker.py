@@ -0,0 +1,167 @@
+"""
+Warm parent process behind `run_python_file` & `run_pytest_tests` (see code_tools.py). It keeps the interpreter and
+its imports (stdlib, pytest, ...) loaded and forks one child per request, so every run skips the start-up but starts
+from the same clean state: env vars, patched modules, recursion limit... set by a script die with its child.
+
+Usage: `python _python_worker.py <request fd> <response fd>`
+Protocol: one JSON request per line on the request fd `{"id", "argv", "cwd", "module", "timeout"}`, answered by one
+JSON line `{"id", "stdout", "stderr"}` on the response fd. Requests may overlap, replies come in completion order.
+fds 0/1/2 are left to the scripts (and their child processes), they never carry the protocol.
+"""
+import atexit
+import contextlib
+import json
+import os
+import runpy
+import selectors
+import signal
+import sys
+import tempfile
+import time
+import traceback
+
+# the protocol's own references, taken before any script runs
+_dumps, _loads = json.dumps, json.loads
+_SKIP_FRAMES = {__file__, runpy.__file__, "<frozen runpy>"}
+
+
+def _print_exception(error: BaseException):
+    """ Traceback as `python script.py` prints it (without the worker/runpy frames) """
+    tb = error.__traceback__
+    while tb is not None and tb.tb_frame.f_code.co_filename in _SKIP_FRAMES:
+        tb = tb.tb_next
+    traceback.print_exception(type(error), error, tb)
+
+
+def _run_child(argv: list[str], cwd: str, module: bool, out_fd: int, err_fd: int, worker_fds: list[int]):
+    """
+    In the forked child: run `argv[0]` as __main__ like a fresh interpreter would (`python -m argv[0]` if `module`),
+    with stdout/stderr going to `out_fd`/`err_fd`. Never returns.
+    """
+    code = 1
+    try:
+        # own process group, a timeout kills the script along with everything it started
+        os.setpgid(0, 0)
+        for fd in worker_fds:
+            os.close(fd)
+        os.dup2(out_fd, 1)
+        os.dup2(err_fd, 2)
+        sys.stdout = open(1, "w", encoding="utf-8", errors="replace", closefd=False)
+        sys.stderr = open(2, "w", encoding="utf-8", errors="backslashreplace", closefd=False)
+
+        os.chdir(cwd)
+        sys.argv = list(argv)
+        sys.path[0] = cwd if module else os.path.dirname(os.path.abspath(argv[0]))
+        try:
+            if module:
+                runpy.run_module(argv[0], run_name="__main__", alter_sys=True)
+            else:
+                runpy.run_path(argv[0], run_name="__main__")
+            code = 0
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                code = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+        except BaseException as e:
+            _print_exception(e)
+        atexit._run_exitfuncs()
+    finally:
+        with contextlib.suppress(BaseException):
+            sys.stdout.flush()
+            sys.stderr.flush()
+        os._exit(code)
+
+
+class _Run:
+    """ A forked request, finished once its `done` pipe reaches EOF (the child exited) or its deadline passed """
+    __slots__ = ("id", "pid", "done", "out_file", "err_file", "deadline", "timeout")
+
+    def __init__(self, request: dict, pid: int, done: int, out_file, err_file):
+        self.id = request["id"]
+        self.pid = pid
+        self.done = done
+        self.out_file = out_file
+        self.err_file = err_file
+        self.timeout = request.get("timeout")
+        self.deadline = time.monotonic() + self.timeout if self.timeout else None
+
+    def kill(self):
+        with contextlib.suppress(ProcessLookupError, PermissionError):
+            os.killpg(self.pid, signal.SIGKILL)
+        with contextlib.suppress(ProcessLookupError):
+            os.kill(self.pid, signal.SIGKILL)
+
+    def reply(self, timed_out: bool = False) -> str:
+        """ Reap the child & build its reply line """
+        os.waitpid(self.pid, 0)
+        os.close(self.done)
+        output = []
+        for file in (self.out_file, self.err_file):
+            file.seek(0)
+            output.append(file.read().decode("utf-8", errors="replace"))
+            file.close()
+        if timed_out:
+            output[1] += f"\nTimed out after {self.timeout}s, the run was killed"
+        return _dumps({"id": self.id, "stdout": output[0], "stderr": output[1]}) + "\n"
+
+
+def main():
+    request_fd, response_fd = int(sys.argv[1]), int(sys.argv[2])
+    # keep the protocol pipes away from processes the scripts start
+    os.set_inheritable(request_fd, False)
+    os.set_inheritable(response_fd, False)
+    # what the tools run most is imported once, every child starts with it
+    with contextlib.suppress(ImportError):
+        import pytest  # noqa: F401
+
+    selector = selectors.DefaultSelector()
+    selector.register(request_fd, selectors.EVENT_READ)
+    running: dict[int, _Run] = {}
+    buffer = b""
+    with open(response_fd, "w", encoding="utf-8") as responses:
+        while True:
+            deadlines = [run.deadline for run in running.values() if run.deadline is not None]
+            timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            for key, _ in selector.select(timeout):
+                if key.fd != request_fd:
+                    # nothing is ever written to `done`, readable means the child exited
+                    run = running.pop(key.fd)
+                    selector.unregister(key.fd)
+                    responses.write(run.reply())
+                    continue
+
+                chunk = os.read(request_fd, 65536)
+                if not chunk:
+                    # code_tools closed the pipe (its process is exiting)
+                    for run in running.values():
+                        run.kill()
+                    return
+                *lines, buffer = (buffer + chunk).split(b"\n")
+                for line in filter(None, lines):
+                    request = _loads(line)
+                    out_file, err_file = tempfile.TemporaryFile(), tempfile.TemporaryFile()
+                    done_read, done_write = os.pipe()
+                    worker_fds = [request_fd, response_fd, selector.fileno(), done_read, *running]
+                    pid = os.fork()
+                    if pid == 0:
+                        _run_child(request["argv"], request["cwd"], request.get("module", False),
+                                   out_file.fileno(), err_file.fileno(), worker_fds)
+                    os.close(done_write)
+                    with contextlib.suppress(OSError):
+                        os.setpgid(pid, pid)
+                    running[done_read] = _Run(request, pid, done_read, out_file, err_file)
+                    selector.register(done_read, selectors.EVENT_READ)
+
+            now = time.monotonic()
+            for fd, run in list(running.items()):
+                if run.deadline is not None and run.deadline <= now:
+                    run.kill()
+                    del running[fd]
+                    selector.unregister(fd)
+                    responses.write(run.reply(timed_out=True))
+            responses.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,137 @@
 from tools.decorator import tool
 from pathlib import Path
+from concurrent.futures import Future
+from typing import Optional
+import atexit
+import json
+import os
 import subprocess
 import sys
+import threading
+import uuid
+
+# one warm interpreter forking a fresh child per run (no python start-up/re-imports per call), see _python_worker.py
+_PY_WORKER_LOCK = threading.Lock()
+_PY_WORKER_PATH = Path(__file__).with_name("_python_worker.py")
+# seconds a script/test run may take before the worker kills it
+_RUN_TIMEOUT = 600
+
+
+class _PythonWorker:
+    """
+    Handle on the worker process. Requests & replies go over their own pipes, the worker's
+    stdin is /dev/null and its stdout/stderr are discarded, so nothing a script (or a child
+    process it starts) reads or writes can block or corrupt the protocol.
+    Runs may overlap, a reader thread hands each reply to the call waiting for its id.
+    """
+    def __init__(self):
+        request_read, request_write = os.pipe()
+        response_read, response_write = os.pipe()
+        try:
+            self.process = subprocess.Popen(
+                [sys.executable, "-u", str(_PY_WORKER_PATH), str(request_read), str(response_write)],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                pass_fds=(request_read, response_write),
+            )
+        finally:
+            # the worker holds its own copies, ours would keep the pipes open after it died
+            os.close(request_read)
+            os.close(response_write)
+        self.requests = open(request_write, "w", encoding="utf-8")
+        self._write_lock = threading.Lock()
+        self._pending: dict[str, Future] = {}
+        self._broken = False
+        self._reader = threading.Thread(target=self._read_replies, args=(open(response_read, encoding="utf-8"),), daemon=True)
+        self._reader.start()
+
+    def alive(self) -> bool:
+        return not self._broken and self.process.poll() is None
+
+    def _read_replies(self, responses):
+        try:
+            with responses:
+                for line in responses:
+                    result = json.loads(line)
+                    future = self._pending.pop(result["id"], None)
+                    if future is not None:
+                        future.set_result((result["stdout"], result["stderr"]))
+        except (ValueError, KeyError):
+            # garbled protocol, don't trust this worker anymore
+            pass
+        finally:
+            # EOF or garbled reply: the next call starts a new worker
+            self._broken = True
+            if self.process.poll() is None:
+                self.process.kill()
+            message = f"Python worker exited with code {self.process.wait()}"
+            for request_id in list(self._pending):
+                future = self._pending.pop(request_id, None)
+                if future is not None:
+                    future.set_result(("", message))
+
+    def run(self, argv: list[str], module: bool = False) -> tuple[str, str]:
+        """ Run a script (or `python -m` a module), returns (stdout, stderr) """
+        request_id = uuid.uuid4().hex
+        future = Future()
+        self._pending[request_id] = future
+        request = {"id": request_id, "argv": argv, "cwd": os.getcwd(), "module": module, "timeout": _RUN_TIMEOUT}
+        try:
+            with self._write_lock:
+                self.requests.write(json.dumps(request) + "\n")
+                self.requests.flush()
+        except (BrokenPipeError, ValueError):
+            # died between the check & the write, the reader thread fails the pending calls
+            pass
+        if self._broken and not future.done():
+            self._pending.pop(request_id, None)
+            return "", f"Python worker exited with code {self.process.wait()}"
+        try:
+            # the worker enforces the timeout, this only guards against the worker itself hanging
+            return future.result(timeout=_RUN_TIMEOUT + 30)
+        except TimeoutError:
+            self._broken = True
+            self.process.kill()
+            return "", f"Python worker didn't answer within {_RUN_TIMEOUT}s and was restarted"
+
+    def close(self):
+        with self._write_lock:
+            try:
+                # the worker exits (killing any running script) once its request pipe closes
+                self.requests.close()
+            except OSError:
+                pass
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+_PY_WORKER: Optional[_PythonWorker] = None
+
+
+def _python_worker() -> _PythonWorker:
+    """ Running worker, (re)started on first use or after it died/broke """
+    global _PY_WORKER
+    with _PY_WORKER_LOCK:
+        if _PY_WORKER is None or not _PY_WORKER.alive():
+            if _PY_WORKER is not None:
+                _PY_WORKER.close()
+            _PY_WORKER = _PythonWorker()
+        return _PY_WORKER
+
+
+def _run_in_worker(argv: list[str], module: bool = False) -> tuple[str, str]:
+    """ Run a script (or `python -m` a module) in a fresh child of the worker, returns (stdout, stderr) """
+    return _python_worker().run(argv, module)
+
+
+@atexit.register
+def _stop_python_worker():
+    if _PY_WORKER is not None:
+        _PY_WORKER.close()
+
 
 @tool()
 def run_python_file(file_path: str) -> dict:
@@ -14,8 +144,8 @@ def run_python_file(file_path: str) -> dict:
         if not p.is_file():
             return {"success": False, "error": f"File not found: {file_path}"}
         
-        result = subprocess.run(["python", str(p)], capture_output=True, text=True)
-        output = f"Stdout:\n{result.stdout}\nStderr:\n{result.stderr}"
+        stdout, stderr = _run_in_worker([str(p)])
+        output = f"Stdout:\n{stdout}\nStderr:\n{stderr}"
         return {"success": True, "result": output.strip()}
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -31,8 +161,9 @@ def run_pytest_tests(directory: str = ".") -> dict:
         if not p.is_dir():
             return {"success": False, "error": f"Directory not found: {directory}"}
         
-        result = subprocess.run([sys.executable, "-m", "pytest", str(p)], capture_output=True, text=True)
-        output = f"Stdout:\n{result.stdout}\nStderr:\n{result.stderr}"
+        # pytest & its plugins are imported once in the worker, each run only collects the tests
+        stdout, stderr = _run_in_worker(["pytest", str(p)], module=True)
+        output = f"Stdout:\n{stdout}\nStderr:\n{stderr}"
         return {"success": True, "result": output.strip()}
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -1,40 +1,61 @@
 from tools.decorator import tool
 from pathlib import Path
+import io
+import os
 import shutil
+import stat
 
-@tool()
+# larger files are refused (they'd blow the LLM context anyway)
+MAX_READ_BYTES = 2_000_000
+
+@tool(pure=True)
 def list_directory_files(path: str = ".", depth: int = 1) -> dict:
     """
-    List files and directories in the given path up to a certain depth using pathlib.
+    List files and directories in the given path up to a certain depth.
     Returns a dictionary with success/error status and result/message.
     """
     try:
-        base = Path(path)
-        if not base.exists():
+        # Path only normalizes the input ("dir/" -> "dir", "" -> ".")
+        top = str(Path(path))
+        if not os.path.exists(top):
             return {"success": False, "error": f"Path not found: {path}"}
         
         result = []
-        for p in base.rglob('*'):
-            current_depth = len(p.relative_to(base).parts)
-            if current_depth <= depth:
-                result.append(str(p))
+        # os.walk + pruning: directories deeper than `depth` are never entered
+        # (rglob walks the whole tree, .git / node_modules included, then filters)
+        for root, dirs, files in os.walk(top):
+            rel = root[len(top):].lstrip(os.sep)
+            root_depth = rel.count(os.sep) + 1 if rel else 0
+            if root_depth >= depth:
+                dirs[:] = []
+                continue
+            # same paths as pathlib (no "./" prefix when listing ".")
+            prefix = rel if top == "." else root
+            for name in dirs + files:
+                result.append(os.path.join(prefix, name))
                 
         return {"success": True, "result": result}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-@tool()
+@tool(pure=True)
 def read_file(file_path: str) -> dict:
     """
     Read the content of a file.
     Returns a dictionary with success/error status and result/message.
     """
     try:
-        # TODO:
-        p = Path(file_path)
-        if not p.is_file():
+        # one stat() for both the existence and the size checks
+        try:
+            st = os.stat(file_path)
+        except FileNotFoundError:
+            st = None
+        if st is None or not stat.S_ISREG(st.st_mode):
             return {"success": False, "error": f"File not found: {file_path}"}
-        content = p.read_text()
+        if st.st_size > MAX_READ_BYTES:
+            return {"success": False, "error": f"File too large: {st.st_size} bytes (max {MAX_READ_BYTES})"}
+        with open(file_path, "rb") as f:
+            content = f.read().decode("utf-8", errors="replace")
         return {"success": True, "result": content}
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -45,11 +66,28 @@ def write_file(file_path: str, content: str) -> dict:
     Write content to a file.
     Returns a dictionary with success/error status and result/message.
     """
+    # (python callers may also pass bytes or an open file object as `content`)
     try:
-        p = Path(file_path)
-        if not p.parent.exists():
-            p.parent.mkdir(parents=True, exist_ok=True)
-        p.write_text(content, encoding='utf-8')
+        parent = os.path.dirname(file_path)
+        if parent and not os.path.isdir(parent):
+            os.makedirs(parent, exist_ok=True)
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            # raw bytes go straight to the fd, no text/encoding layer
+            view = memoryview(content)
+            fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                while view:
+                    view = view[os.write(fd, view):]
+            finally:
+                os.close(fd)
+        elif hasattr(content, "read"):
+            # streamed in chunks, never fully loaded in memory
+            text_source = isinstance(content, io.TextIOBase)
+            with open(file_path, "w" if text_source else "wb", encoding="utf-8" if text_source else None) as f:
+                shutil.copyfileobj(content, f, 1 << 20)
+        else:
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write(content)
         return {"success": True, "result": True}
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -61,10 +99,9 @@ def create_folder(folder_path: str) -> dict:
     Returns a dictionary with success/error status and result/message.
     """
     try:
-        p = Path(folder_path)
-        if p.exists():
+        if os.path.exists(folder_path):
             return {"success": False, "error": f"Folder already exists: {folder_path}"}
-        p.mkdir(parents=True, exist_ok=False)
+        os.makedirs(folder_path)
         return {"success": True, "result": True}
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -76,10 +113,9 @@ def remove_folder(folder_path: str) -> dict:
     Returns a dictionary with success/error status and result/message.
     """
     try:
-        p = Path(folder_path)
-        if not p.is_dir():
+        if not os.path.isdir(folder_path):
             return {"success": False, "error": f"Folder not found: {folder_path}"}
-        shutil.rmtree(p)        
+        shutil.rmtree(folder_path)
         return {"success": True, "result": True}
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -91,11 +127,9 @@ def remove_file(file_path: str) -> dict:
     Returns a dictionary with success/error status and result/message.
     """
     try:
-        # TODO:
-        p = Path(file_path)
-        if not p.is_file():
+        if not os.path.isfile(file_path):
             return {"success": False, "error": f"File not found: {file_path}"}
-        p.unlink()
+        os.remove(file_path)
         return {"success": True, "result": True}
     except Exception as e:
         return {"success": False, "error": str(e)}
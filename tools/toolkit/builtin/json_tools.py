@@ -1,7 +1,8 @@
+from json_utils import json_loads
 from tools.decorator import tool
 import json
 
-@tool()
+@tool(pure=True)
 def json_is_valid(s: str) -> bool:
     """
     Check if the input string is valid JSON.
@@ -12,6 +13,13 @@ def json_is_valid(s: str) -> bool:
     Returns:
         True if the string is valid JSON, False otherwise.
     """
+    try:
+        json_loads(s)
+        return True
+    except ValueError:
+        pass
+    # orjson is stricter than the stdlib (numbers out of float range like `1e400`, lone surrogates like
+    # "\ud800", NaN/Infinity), only a string both reject is reported invalid
     try:
         json.loads(s)
         return True
@@ -3,31 +3,57 @@ from typing import Literal
 from browser_manager import get_page, close_page
 from loguru import logger
 import base64
+import functools
+
+# session_id -> body text read by the last `get_page_content(offset=0)`, the next slices are served from it
+_PAGE_TEXT_CACHE: dict[str, str] = {}
 
 @tool()
-def goto_url(url: str, session_id: str = "default") -> str:
-    """Go to a URL and return page title + status."""
-    logger.debug(f"[goto_url] url={url}, session_id={session_id}")
+def goto_url(url: str, need_title: bool = False, session_id: str = "default") -> str:
+    """
+    Go to a URL and return its final URL + HTTP status.
+
+    Args:
+        need_title: also return the page title (costs one more browser call, only ask for it when needed)
+    """
+    logger.debug(f"[goto_url] url={url}, need_title={need_title}, session_id={session_id}")
     page = get_page(session_id)
+    _PAGE_TEXT_CACHE.pop(session_id, None)
     try:
         response = page.goto(url, wait_until="domcontentloaded")
+        title = page.title() if need_title else None
+        page_url = page.url
         status = response.status if response else "unknown"
-        return f"Navigated to: {page.title()}\nURL: {page.url}\nHTTP Status: {status}"
+        if need_title:
+            return f"Navigated to: {title}\nURL: {page_url}\nHTTP Status: {status}"
+        return f"Navigated\nURL: {page_url}\nHTTP Status: {status}"
     except Exception as e:
         return f"Failed to navigate to {url}: {str(e)}"
 
 @tool()
-def get_page_content(mode: Literal["text", "html"] = "text", session_id: str = "default") -> str:
+def get_page_content(mode: Literal["text", "html"] = "text", max_chars: int = 32000, offset: int = 0, session_id: str = "default") -> str:
     """
     Get the current page content in different formats.
 
     Args:
         mode: "text" (clean readable text), "html" (full source)
+        max_chars: text mode returns at most this many characters per call
+        offset: text mode starts at this character, to read the rest of a long page
     """
-    logger.debug(f"[get_page_content] mode={mode}, session_id={session_id}")
+    logger.debug(f"[get_page_content] mode={mode}, offset={offset}, session_id={session_id}")
     page = get_page(session_id)
     if mode == "text":
-        return page.locator("body").inner_text()
+        if offset < 0 or max_chars <= 0:
+            return f"Invalid offset={offset} / max_chars={max_chars}: offset must be >= 0 and max_chars > 0"
+        # offset 0 reads the page again (it may have changed), later slices reuse that read
+        text = _PAGE_TEXT_CACHE.get(session_id) if offset > 0 else None
+        if text is None:
+            text = page.locator("body").inner_text()
+            _PAGE_TEXT_CACHE[session_id] = text
+        end = offset + max_chars
+        if end >= len(text):
+            return text[offset:]
+        return f"{text[offset:end]}\n\n[truncated: characters {offset}-{end} of {len(text)}, call again with offset={end} for more]"
     elif mode == "html":
         # Prefer the native Playwright `content` method if available.
         if hasattr(page, "content") and callable(getattr(page, "content")):
@@ -47,23 +73,32 @@ def get_page_content(mode: Literal["text", "html"] = "text", session_id: str = "
     else:
         return "Invalid mode"
 
+def _text_strategy(page, target: str):
+    return page.get_by_text(target, exact=False)
+
+def _role_strategy(page, target: str):
+    role_name, _, role_label = target.partition(" name=")
+    return page.get_by_role(role_name, name=role_label or None)
+
+# selector prefix -> locator strategy (anything else is a CSS selector)
+_SELECTOR_STRATEGIES = {"text=": _text_strategy, "role=": _role_strategy}
+
+@functools.lru_cache(maxsize=None)
+def _supports_load_state(page_type: type) -> bool:
+    """ Checked once per page class instead of on every click """
+    return hasattr(page_type, "wait_for_load_state")
+
 @tool()
 def click_element(selector: str, session_id: str = "default") -> str:
     """Click an element by visible text, role, or CSS selector."""
     logger.debug(f"[click_element] selector={selector}, session_id={session_id}")
     page = get_page(session_id)
+    # a click may navigate
+    _PAGE_TEXT_CACHE.pop(session_id, None)
     try:
         # Determine the appropriate locator strategy.
-        if selector.startswith("text="):
-            element = page.get_by_text(selector[5:], exact=False)
-        elif selector.startswith("role="):
-            role_part = selector[5:]
-            role_split = role_part.split(" name=")
-            role_name = role_split[0]
-            role_label = role_split[1] if len(role_split) > 1 else None
-            element = page.get_by_role(role_name, name=role_label)
-        else:
-            element = page.locator(selector)
+        strategy = _SELECTOR_STRATEGIES.get(selector[:5])
+        element = strategy(page, selector[5:]) if strategy else page.locator(selector)
 
         # Playwright locators expose a `.first` property; our mocks may implement it as a method or not at all.
         if hasattr(element, "first"):
@@ -78,7 +113,7 @@ def click_element(selector: str, session_id: str = "default") -> str:
             raise AttributeError("Locator does not support click")
 
         # Wait for navigation/network idle to mimic real behavior.
-        if hasattr(page, "wait_for_load_state"):
+        if _supports_load_state(type(page)):
             page.wait_for_load_state("networkidle", timeout=10000)
         return f"Clicked: {selector} \u2192 New URL: {page.url}"
     except Exception as e:
@@ -89,6 +124,8 @@ def fill_input(selector: str, value: str, session_id: str = "default") -> str:
     "Fill a form input field."
     logger.debug(f"[fill_input] selector={selector}, value={value}, session_id={session_id}")
     page = get_page(session_id)
+    # typing may re-render the page (search-as-you-type, validation messages...)
+    _PAGE_TEXT_CACHE.pop(session_id, None)
     try:
         page.fill(selector, value)
         return f"Filled input '{selector}' with value '{value}'."   
@@ -96,15 +133,22 @@ def fill_input(selector: str, value: str, session_id: str = "default") -> str:
         return f"Failed to fill input '{selector}': {str(e)}"
     
 @tool()
-def screenshot(full_page: bool = False, session_id: str = "default") -> str:
-    "Take a screenshot of the current page and return as base64."
-    logger.debug(f"[screenshot] full_page={full_page}, session_id={session_id}")
+def screenshot(full_page: bool = False, fmt: Literal["png", "jpeg"] = "jpeg", quality: int = 70, session_id: str = "default") -> str:
+    """
+    Take a screenshot of the current page and return as base64.
+
+    Args:
+        fmt: "jpeg" (much smaller, default) or "png" (lossless)
+        quality: jpeg quality 0-100 (ignored for png)
+    """
+    logger.debug(f"[screenshot] full_page={full_page}, fmt={fmt}, session_id={session_id}")
     page = get_page(session_id)
     try:
-        screenshot_bytes = page.screenshot(full_page=full_page)
-        # convert bytes to base64 string
-        screenshot_b64 = base64.b64encode(screenshot_bytes).decode('utf-8')
-        return f"data:image/png;base64,{screenshot_b64}"
+        # jpeg encodes faster than png (zlib) and gives far fewer bytes to base64 & send to the model
+        screenshot_bytes = page.screenshot(full_page=full_page, type=fmt, quality=quality if fmt == "jpeg" else None)
+        # convert bytes to base64 string (base64 output is pure ascii)
+        screenshot_b64 = base64.b64encode(screenshot_bytes).decode('ascii')
+        return f"data:image/{fmt};base64,{screenshot_b64}"
     except Exception as e:
         return f"Failed to take screenshot: {str(e)}"
 
@@ -112,6 +156,7 @@ def screenshot(full_page: bool = False, session_id: str = "default") -> str:
 def end_browsing_page(session_id: str = "default") -> str:
     "Close the page (use only when done browsing)."
     logger.debug(f"[end_browsing_page] session_id={session_id}")
+    _PAGE_TEXT_CACHE.pop(session_id, None)
     try:
         close_page(session_id)
         return "Page closed and session terminated."